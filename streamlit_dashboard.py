@@ -2,12 +2,19 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
-from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.compute as pc
+from datetime import datetime
+from io import BytesIO
+import hashlib
+import importlib.util
 import warnings
 import traceback
 
+# calamine is a Rust-based reader, much faster than openpyxl for xlsx/xls/xlsm
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
@@ -25,25 +32,353 @@ if 'file_history' not in st.session_state:
 if 'current_file_index' not in st.session_state:
     st.session_state.current_file_index = None
 
+# Date columns used in the analysis
+DATE_COLUMNS = ['Call Received Date', 'Tentative Date', 'Engineer Visit Date',
+                'Quote Sent', 'Call Close Date']
+
+# Text date formats tried before falling back to pandas' per-value format inference.
+# Month-first comes before day-first, as in pd.to_datetime, so ambiguous dates such
+# as 01/02/2024 stay 2 Jan - a column is read day-first only when a sampled value
+# has a day above 12
+DATE_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d',
+                '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%Y',
+                '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+                '%m-%d-%Y', '%d-%m-%Y']
+
+# SOL ID column spellings, lowercased ('SOL ID', 'Sol Id', 'SOLID', ...)
+SOL_ID_NAMES = ('sol id', 'solid')
+
+# Rows per page in the Raw Data tab
+RAW_DATA_PAGE_SIZE = 1000
+
+# Rows sent to the browser for detail tables such as the duplicate list
+MAX_TABLE_ROWS = 1000
+
+# Uploads kept in the file history - the oldest is dropped past this
+MAX_FILE_HISTORY = 10
+
 # Helper function to fix dataframe for Arrow compatibility
 def fix_dataframe_for_arrow(df):
     """Convert all problematic columns to Arrow-compatible types"""
-    df_fixed = df.copy()
+    # Nothing to convert - hand the frame back as it is
+    if not (df.dtypes == 'object').any():
+        return df
+   
+    fixed_columns = {}
    
-    # Convert all columns to appropriate types
-    for col in df_fixed.columns:
-        # Skip if already datetime
-        if pd.api.types.is_datetime64_any_dtype(df_fixed[col]):
-            continue
-           
-        # If object type, convert to string first
-        if df_fixed[col].dtype == 'object':
-            df_fixed[col] = df_fixed[col].astype(str)
-            # Replace string representations of NaN/NaT
-            df_fixed[col] = df_fixed[col].replace(['nan', 'NaT', 'None', '<NA>'], '')
-            df_fixed[col] = df_fixed[col].replace('', None)
+    for col in df.columns:
+        series = df[col]
+        # Sheets are loaded with Arrow-backed dtypes, so only mixed-type object
+        # columns are left to convert - everything else is passed through by
+        # reference instead of being copied.
+        # Casting straight to Arrow-backed strings keeps missing values as real
+        # nulls, so there are no 'nan'/'None' strings left to clean up
+        if series.dtype == 'object':
+            series = series.astype('string[pyarrow]')
+        fixed_columns[col] = series
    
-    return df_fixed
+    return pd.DataFrame(fixed_columns, copy=False)
+
+# Convert a low-cardinality column to category dtype
+def to_category(series):
+    """Convert a column to category dtype so filters and groupbys work on integer codes"""
+    # Mixed-type object columns (e.g. numeric and text IDs) are stringified first
+    # so the categories stay sortable and Arrow-compatible
+    if series.dtype == 'object':
+        series = series.astype('string')
+    return series.astype('category')
+
+# Call Status values that count as closed
+def find_closed_statuses(status):
+    """Return the 'Close'/'Closed' status values - on category columns only the categories are scanned"""
+    if isinstance(status.dtype, pd.CategoricalDtype):
+        values = status.cat.categories
+    else:
+        values = status.dropna().unique()
+    return [value for value in values if 'close' in str(value).lower()]
+
+# Value counts of a category column
+def count_categories(series):
+    """Count each category with a single np.bincount pass over the integer codes"""
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    return pd.Series(counts, index=series.cat.categories.rename(series.name), name='count')
+
+# Top-k selection from a counts Series
+def top_counts(counts, k):
+    """Return the k largest counts, largest first - a partial sort instead of sorting every value"""
+    values = counts.to_numpy()
+    top_idx = np.arange(len(values))
+    if len(values) > k:
+        # Everything above the k-th largest count is in; entries tied with it are
+        # taken in their original order, so the cut doesn't depend on the partition
+        threshold = np.partition(values, -k)[-k]
+        above = np.flatnonzero(values > threshold)
+        tied = np.flatnonzero(values == threshold)[:k - len(above)]
+        top_idx = np.concatenate([above, tied])
+    # Only the k selected entries are fully sorted - by count, then original order
+    top_idx = top_idx[np.lexsort((top_idx, -values[top_idx]))]
+    return counts.iloc[top_idx]
+
+# Co-occurrence counts of two category columns
+def pair_counts(left, right):
+    """Count (left, right) value pairs in one pass over the category codes, most frequent first"""
+    n_right = len(right.cat.categories)
+    left_codes = left.cat.codes.to_numpy().astype(np.int64)
+    right_codes = right.cat.codes.to_numpy().astype(np.int64)
+    valid = (left_codes >= 0) & (right_codes >= 0)
+    # Pack each pair into a single int64 key and count the distinct keys
+    keys, counts = np.unique(left_codes[valid] * n_right + right_codes[valid], return_counts=True)
+    pairs = pd.DataFrame({
+        'Left': left.cat.categories[keys // n_right],
+        'Right': right.cat.categories[keys % n_right],
+        'Count': counts
+    })
+    return pairs.sort_values('Count', ascending=False, kind='stable')
+
+# Monthly complaint counts
+def monthly_counts(dates):
+    """Count dates per calendar month using NumPy datetime64[M] buckets instead of Period objects"""
+    months = dates.dropna().to_numpy().astype('datetime64[M]')
+    keys, counts = np.unique(months, return_counts=True)
+    return pd.Series(counts, index=pd.DatetimeIndex(keys.astype('datetime64[ns]')))
+
+# Count day gaps between two dates
+def count_gaps_over(start, end, days):
+    """Number of rows where end - start is more than `days` whole days (NaT never counts)"""
+    # Compared as timedelta64 directly - no .dt.days Series is built just to be counted
+    gaps = np.asarray(end, dtype='datetime64[ns]') - np.asarray(start, dtype='datetime64[ns]')
+    return int(np.count_nonzero(gaps >= np.timedelta64(days + 1, 'D')))
+
+# Date parsing with format detection
+def parse_dates(series):
+    """Convert a column to datetime, pinning an explicit format when one fits a sample of the text values"""
+    sample = [value for value in series.dropna().head(100) if isinstance(value, str)]
+    if sample:
+        for date_format in DATE_FORMATS:
+            if pd.to_datetime(pd.Series(sample), format=date_format, errors='coerce').notna().all():
+                # An explicit format takes the fast strptime path instead of per-value inference
+                return pd.to_datetime(series, format=date_format, errors='coerce', cache=True)
+    return pd.to_datetime(series, errors='coerce', cache=True)
+
+# Tidy a single parsed sheet of an Excel workbook
+def clean_sheet(sheet_df):
+    """Strip column names, drop blank header-less columns and convert dates and dtypes"""
+    # Clean column names (a blank sheet has an integer RangeIndex, so cast first)
+    sheet_df.columns = sheet_df.columns.astype(str).str.strip()
+   
+    # Drop blank header-less columns (formatting left past the data range) so they
+    # aren't converted, combined and rendered for nothing
+    blank_columns = [col for col in sheet_df.columns
+                     if str(col).startswith('Unnamed:') and sheet_df[col].isna().all()]
+    sheet_df = sheet_df.drop(columns=blank_columns)
+   
+    # Convert date columns (already-parsed Excel dates are left as they are)
+    for col in DATE_COLUMNS:
+        if col in sheet_df.columns and not pd.api.types.is_datetime64_any_dtype(sheet_df[col]):
+            sheet_df[col] = parse_dates(sheet_df[col])
+   
+    # Move text and numeric columns to Arrow-backed dtypes once, at load time, so
+    # nulls are real nulls and st.dataframe can serialize them without conversion.
+    # Datetime columns stay numpy-backed for the .dt/period arithmetic in the tabs
+    for col in sheet_df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(sheet_df[col]):
+            sheet_df[col] = sheet_df[col].convert_dtypes(dtype_backend='pyarrow')
+   
+    return sheet_df
+
+# Plotly figures built for the current filter selection
+def cached_figure(filter_key, name, build_figure):
+    """Return the figure stored for this filter selection, calling build_figure() only on a miss"""
+    # A new file or filter selection invalidates every stored figure
+    if st.session_state.get('figure_cache_key') != filter_key:
+        st.session_state.figure_cache_key = filter_key
+        st.session_state.figure_cache = {}
+    if name not in st.session_state.figure_cache:
+        st.session_state.figure_cache[name] = build_figure()
+    return st.session_state.figure_cache[name]
+
+# Parse a whole Excel workbook
+def read_workbook(file_bytes, engine=EXCEL_ENGINE):
+    """Parse every sheet of an Excel workbook into a {sheet_name: DataFrame} dict"""
+    # One read_excel call opens the workbook once and parses every sheet from it -
+    # per-sheet reads reopen the container each time, and threading them gains nothing
+    # because parsing holds the GIL
+    raw_sheets = pd.read_excel(BytesIO(file_bytes), sheet_name=None, engine=engine)
+    return {sheet: clean_sheet(sheet_df) for sheet, sheet_df in raw_sheets.items()}
+
+# Cached workbook parsing - reruns reuse the parsed sheets instead of re-reading the file.
+# The file-level caches are keyed on the upload's md5 digest, computed once when the file
+# is added to the history, so reruns don't hash the whole workbook again. They keep the
+# last 8 workbooks and row-sized per-filter caches the last 16 selections, so a long
+# file history doesn't keep every parse in memory
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_workbook(digest, _file_bytes):
+    """Parse a workbook with the fast engine, retrying with pandas' default for files it rejects (_file_bytes is not hashed)"""
+    try:
+        return read_workbook(_file_bytes)
+    except Exception:
+        if EXCEL_ENGINE is None:
+            raise
+        return read_workbook(_file_bytes, engine=None)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_preview(digest, _file_bytes, nrows=3):
+    """First rows of every sheet, already converted for Arrow display (_file_bytes is not hashed)"""
+    workbook = load_workbook(digest, _file_bytes)
+    return {sheet: fix_dataframe_for_arrow(sheet_df.head(nrows)) for sheet, sheet_df in workbook.items()}
+
+# pandas dtype for each Arrow type when combined sheets are converted back
+def sheet_dtype(arrow_type):
+    """ArrowDtype for text and numbers, as clean_sheet produces - None keeps the numpy datetime and categorical defaults"""
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+# Stack several sheets into one dataset
+def combine_sheets(workbook, sheet_names):
+    """Concatenate sheets with a Source_Sheet column, via Arrow tables when the data allows it"""
+    # Source_Sheet is stored as codes into the list of combined sheets, so the
+    # result is categorical without hashing a repeated sheet name per row
+    sheet_names = list(sheet_names)
+    try:
+        # Arrow concatenation links the per-sheet buffers instead of copying them into new blocks
+        tables = []
+        for code, sheet in enumerate(sheet_names):
+            table = pa.Table.from_pandas(workbook[sheet], preserve_index=False)
+            source = pa.DictionaryArray.from_arrays(np.full(table.num_rows, code, dtype=np.int32), sheet_names)
+            tables.append(table.append_column('Source_Sheet', source))
+        # Explicit dtypes, so a column has the same dtype however many sheets are selected
+        return pa.concat_tables(tables, promote_options='permissive').to_pandas(types_mapper=sheet_dtype)
+    except (ValueError, pa.ArrowException):
+        # Mixed-type object columns have no Arrow type, and some column types can't
+        # be unified across sheets - fall back to pandas for any Arrow failure
+        frames = []
+        for code, sheet in enumerate(sheet_names):
+            source = pd.Categorical.from_codes(np.full(len(workbook[sheet]), code), categories=sheet_names)
+            frames.append(workbook[sheet].assign(Source_Sheet=source))
+        return pd.concat(frames, ignore_index=True, sort=False)
+
+# Find the SOL ID column (check various possible names)
+def find_sol_id_column(columns):
+    """Return the first column whose name contains a known SOL ID spelling, or None"""
+    for col in columns:
+        col_lower = col.lower()
+        if any(sol_name in col_lower for sol_name in SOL_ID_NAMES):
+            return col
+    return None
+
+# Cached analysis dataset - selecting/combining sheets and the category conversion
+# only run when the file or the sheet selection changes
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_dataset(digest, _file_bytes, sheet_names, combine):
+    """Frame for the selected sheets, with low-cardinality columns converted to category dtype (_file_bytes is not hashed)"""
+    workbook = load_workbook(digest, _file_bytes)
+    if combine:
+        df = combine_sheets(workbook, sheet_names)
+    else:
+        df = workbook[sheet_names[0]]
+   
+    # Categorical columns - repeated strings become integer codes
+    category_columns = ['State', 'Branch', 'Nature Of Fault', 'Call Status', 'Source_Sheet',
+                        find_sol_id_column(df.columns)]
+    for col in category_columns:
+        if col in df.columns:
+            df[col] = to_category(df[col])
+   
+    # Other text columns with mostly repeated values (engineer, product, ...) get
+    # the same treatment - mostly-unique ones such as remarks stay as strings
+    for col in df.columns:
+        if (pd.api.types.is_string_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype)
+                and df[col].nunique() < len(df) * 0.5):
+            df[col] = to_category(df[col])
+   
+    return df
+
+# Cached aggregates - keyed on the filter selection so reruns that don't change it are free
+@st.cache_data(show_spinner=False)
+def cached_value_counts(_df, filter_key, column):
+    """Unsorted value counts of a column, memoized per filter selection (_df is not hashed)"""
+    # Callers rank with top_counts(), so no full sort is done here
+    if isinstance(_df[column].dtype, pd.CategoricalDtype):
+        counts = count_categories(_df[column])
+    else:
+        counts = _df[column].value_counts(sort=False)
+    # Category columns also report categories that were filtered out
+    return counts[counts > 0]
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_group_rows(_df, filter_key, column):
+    """Row positions for each value of a column, memoized per filter selection (_df is not hashed)"""
+    # Picking a value is then a lookup and a take instead of comparing every row
+    return _df.groupby(column, observed=True, sort=False).indices
+
+@st.cache_data(show_spinner=False)
+def cached_missing_counts(_df, filter_key):
+    """Missing values per column, memoized per filter selection (_df is not hashed)"""
+    # Count nulls column by column - avoids materializing a full boolean frame
+    return np.array([_df[col].isna().sum() for col in _df.columns])
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_duplicate_mask(_df, filter_key, column):
+    """Rows whose value in column occurs more than once, memoized per filter selection (_df is not hashed)"""
+    # Repeated IDs from one hash count, then a single isin() lookup
+    id_counts = _df[column].value_counts(dropna=False)
+    return _df[column].isin(id_counts.index[id_counts > 1]).to_numpy()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_month_labels(_dates, filter_key):
+    """'YYYY-MM' label of each date, memoized per filter selection (_dates is not hashed)"""
+    # Vectorized month truncation instead of building a Period object per row
+    months = np.datetime_as_string(_dates.to_numpy().astype('datetime64[M]'))
+    return pd.Series(months, index=_dates.index, name='Month')
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_csv(_df, filter_key):
+    """Data as CSV bytes, memoized per filter selection (_df is not hashed)"""
+    # to_csv for every frame, so the download keeps one format - minimal quoting
+    # and date-only values without a midnight time
+    return _df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(show_spinner=False)
+def cached_summary_csv(_df, filter_key):
+    """describe() report as CSV bytes, memoized per filter selection (_df is not hashed)"""
+    return _df.describe(include='all').to_csv().encode('utf-8')
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_search_text(_df, filter_key):
+    """Lowercased text of each row with all columns joined, memoized per filter selection (_df is not hashed)"""
+    columns = [pa.array(_df[col].to_numpy(dtype=object).astype(str), type=pa.string()) for col in _df.columns]
+    # Newline separator so a search can't match across two columns
+    row_text = pc.utf8_lower(pc.binary_join_element_wise(*columns, '\n'))
+    return pd.Series(pd.arrays.ArrowStringArray(row_text), index=_df.index)
+
+# Searchable, paginated Raw Data table
+@st.fragment
+def raw_data_table(df_analysis, filter_key):
+    """Search box and page slider - as a fragment, typing or paging reruns only this table"""
+    search = st.text_input("🔍 Search in data", key="raw_search")
+   
+    if search:
+        # One plain substring scan over the pre-joined row text instead of a regex per column
+        mask = cached_search_text(df_analysis, filter_key).str.contains(search.lower(), regex=False)
+        raw_rows = df_analysis[mask]
+        st.write(f"Found {len(raw_rows)} matching records")
+    else:
+        raw_rows = df_analysis
+   
+    # Paginate - only the visible page is converted and sent to the browser
+    page_start = 0
+    if len(raw_rows) > RAW_DATA_PAGE_SIZE:
+        last_page_start = (len(raw_rows) - 1) // RAW_DATA_PAGE_SIZE * RAW_DATA_PAGE_SIZE
+        page_start = st.slider("Row start", 0, last_page_start, 0, step=RAW_DATA_PAGE_SIZE)
+        page_end = min(page_start + RAW_DATA_PAGE_SIZE, len(raw_rows))
+        st.caption(f"Showing rows {page_start + 1:,}-{page_end:,} of {len(raw_rows):,}")
+   
+    # Fix dataframe for display
+    df_display = fix_dataframe_for_arrow(raw_rows.iloc[page_start:page_start + RAW_DATA_PAGE_SIZE])
+    # Fixed height keeps the grid to a scrolling window of rows
+    st.dataframe(df_display, use_container_width=True, height=500)
 
 # Title
 st.title("📊 Complaint Management Analytics Dashboard")
@@ -58,24 +393,36 @@ uploaded_file = st.file_uploader(
 
 # Add uploaded file to history
 if uploaded_file is not None:
-    file_info = {
-        'name': uploaded_file.name,
-        'size': uploaded_file.size,
-        'upload_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'file_obj': uploaded_file
-    }
-   
     # Check if file already in history (by name)
     file_names = [f['name'] for f in st.session_state.file_history]
+    existing_idx = file_names.index(uploaded_file.name) if uploaded_file.name in file_names else None
    
-    if uploaded_file.name not in file_names:
-        st.session_state.file_history.append(file_info)
-        st.session_state.current_file_index = len(st.session_state.file_history) - 1
-    else:
-        # Update existing file
-        existing_idx = file_names.index(uploaded_file.name)
-        st.session_state.file_history[existing_idx] = file_info
+    # The uploader hands back the same file on every rerun - reuse the stored entry
+    # and only read and hash an upload that is new or has been replaced
+    if existing_idx is not None and st.session_state.file_history[existing_idx]['file_id'] == uploaded_file.file_id:
         st.session_state.current_file_index = existing_idx
+    else:
+        file_info = {
+            'name': uploaded_file.name,
+            'size': uploaded_file.size,
+            'file_id': uploaded_file.file_id,
+            'upload_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            # Keep the raw bytes rather than the UploadedFile handle - bytes don't
+            # need rewinding and give the workbook cache a stable key
+            'bytes': uploaded_file.getvalue()
+        }
+        file_info['digest'] = hashlib.md5(file_info['bytes']).hexdigest()
+       
+        if existing_idx is None:
+            st.session_state.file_history.append(file_info)
+            # Each entry holds the whole workbook, so cap how many the session keeps
+            if len(st.session_state.file_history) > MAX_FILE_HISTORY:
+                st.session_state.file_history.pop(0)
+            st.session_state.current_file_index = len(st.session_state.file_history) - 1
+        else:
+            # Update existing file
+            st.session_state.file_history[existing_idx] = file_info
+            st.session_state.current_file_index = existing_idx
 
 # Sidebar - File History
 st.sidebar.header("📁 Uploaded Files History")
@@ -84,34 +431,26 @@ if len(st.session_state.file_history) > 0:
     st.sidebar.write(f"**Total Files:** {len(st.session_state.file_history)}")
     st.sidebar.markdown("---")
    
-    # Display each file with details
-    for idx, file_info in enumerate(st.session_state.file_history):
-        is_current = (idx == st.session_state.current_file_index)
+    # One radio for the whole history instead of an expander + buttons per file,
+    # so the sidebar widget tree doesn't grow with the number of uploads
+    history_names = [f['name'] for f in st.session_state.file_history]
+    selected_idx = st.sidebar.radio(
+        "Select File",
+        range(len(history_names)),
+        index=st.session_state.current_file_index,
+        format_func=lambda idx: history_names[idx]
+    )
+    if selected_idx is not None:
+        st.session_state.current_file_index = selected_idx
        
-        with st.sidebar.expander(
-            f"{'✅ ' if is_current else '📄 '}{file_info['name']}",
-            expanded=is_current
-        ):
-            st.write(f"**Size:** {file_info['size'] / 1024:.2f} KB")
-            st.write(f"**Uploaded:** {file_info['upload_time']}")
-           
-            col1, col2 = st.columns(2)
-            with col1:
-                if not is_current:
-                    if st.button(f"📂 Load", key=f"load_{idx}"):
-                        st.session_state.current_file_index = idx
-                        st.rerun()
-                else:
-                    st.success("Current")
-           
-            with col2:
-                if st.button(f"🗑️ Delete", key=f"remove_{idx}"):
-                    st.session_state.file_history.pop(idx)
-                    if st.session_state.current_file_index == idx:
-                        st.session_state.current_file_index = None
-                    elif st.session_state.current_file_index and st.session_state.current_file_index > idx:
-                        st.session_state.current_file_index -= 1
-                    st.rerun()
+        # Details for the selected file only
+        file_info = st.session_state.file_history[selected_idx]
+        st.sidebar.caption(f"Size: {file_info['size'] / 1024:.2f} KB · Uploaded: {file_info['upload_time']}")
+       
+        if st.sidebar.button("🗑️ Delete Selected File"):
+            st.session_state.file_history.pop(selected_idx)
+            st.session_state.current_file_index = None
+            st.rerun()
    
     # Clear all button
     st.sidebar.markdown("---")
@@ -125,17 +464,26 @@ else:
 st.sidebar.markdown("---")
 
 # Get current file to process
-current_file = None
+current_bytes = None
 if st.session_state.current_file_index is not None and len(st.session_state.file_history) > 0:
-    current_file = st.session_state.file_history[st.session_state.current_file_index]['file_obj']
+    current_file = st.session_state.file_history[st.session_state.current_file_index]
+    current_bytes = current_file['bytes']
+    current_digest = current_file['digest']
 elif uploaded_file is not None:
-    current_file = uploaded_file
+    current_bytes = uploaded_file.getvalue()
+    current_digest = hashlib.md5(current_bytes).hexdigest()
 
-if current_file is not None:
+if current_bytes is not None:
+    # Loading progress is drawn out here - elements created inside the cached loaders
+    # would be recorded and replayed on every cache hit. On a cached rerun both loaders
+    # return at once and the bar is cleared in the same run
+    load_progress = st.progress(0.0, text="📖 Reading workbook...")
     try:
-        # Read all sheets from Excel file
-        excel_file = pd.ExcelFile(current_file)
-        sheet_names = excel_file.sheet_names
+        # Read all sheets from Excel file (cached on the file digest) - the
+        # per-sheet previews give the sheet names without copying every sheet out
+        previews = load_preview(current_digest, current_bytes)
+        sheet_names = list(previews.keys())
+        load_progress.progress(0.5, text="📊 Preparing the selected sheets...")
        
         st.success(f"✅ File loaded successfully! Found {len(sheet_names)} sheet(s)")
        
@@ -149,8 +497,7 @@ if current_file is not None:
             with col2:
                 st.write("**Preview (First 3 rows)**")
                 for sheet in sheet_names:
-                    preview_df = pd.read_excel(excel_file, sheet_name=sheet, nrows=3)
-                    preview_df = fix_dataframe_for_arrow(preview_df)
+                    preview_df = previews[sheet]
                     st.write(f"**{sheet}:**")
                     st.dataframe(preview_df, use_container_width=True)
                     st.markdown("---")
@@ -169,22 +516,16 @@ if current_file is not None:
        
         if combine_option == "Select Single Sheet":
             selected_sheet = st.sidebar.selectbox("Select Sheet to Analyze", sheet_names)
-            df = pd.read_excel(excel_file, sheet_name=selected_sheet)
+            df = load_dataset(current_digest, current_bytes, (selected_sheet,), False)
             selected_sheets = [selected_sheet]
             st.info(f"📊 Analyzing: **{selected_sheet}**")
            
         elif combine_option == "Combine All Sheets":
             st.info(f"📊 Combining all {len(sheet_names)} sheets into one dataset")
            
-            all_dfs = []
-            for sheet in sheet_names:
-                temp_df = pd.read_excel(excel_file, sheet_name=sheet)
-                temp_df['Source_Sheet'] = sheet
-                all_dfs.append(temp_df)
-           
-            df = pd.concat(all_dfs, ignore_index=True, sort=False)
+            df = load_dataset(current_digest, current_bytes, tuple(sheet_names), True)
             selected_sheets = sheet_names
-            st.success(f"✅ Combined {len(all_dfs)} sheets with {len(df)} total records")
+            st.success(f"✅ Combined {len(sheet_names)} sheets with {len(df)} total records")
            
         else:  # Select Multiple Sheets
             selected_sheets = st.sidebar.multiselect(
@@ -196,32 +537,21 @@ if current_file is not None:
             if selected_sheets:
                 st.info(f"📊 Combining {len(selected_sheets)} selected sheet(s)")
                
-                all_dfs = []
-                for sheet in selected_sheets:
-                    temp_df = pd.read_excel(excel_file, sheet_name=sheet)
-                    temp_df['Source_Sheet'] = sheet
-                    all_dfs.append(temp_df)
-               
-                df = pd.concat(all_dfs, ignore_index=True, sort=False)
+                df = load_dataset(current_digest, current_bytes, tuple(selected_sheets), True)
                 st.success(f"✅ Combined {len(selected_sheets)} sheets with {len(df)} total records")
             else:
+                load_progress.empty()
                 st.warning("⚠️ Please select at least one sheet")
                 st.stop()
        
-        # Clean column names
-        df.columns = df.columns.str.strip()
-       
-        # Store original date columns for analysis
-        date_columns = ['Call Received Date', 'Tentative Date', 'Engineer Visit Date',
-                       'Quote Sent', 'Call Close Date']
+        load_progress.empty()
+        sol_id_column = find_sol_id_column(df.columns)
        
-        # Convert date columns
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
+        # Closed status values, found once so later checks are plain isin() lookups
+        closed_statuses = find_closed_statuses(df['Call Status']) if 'Call Status' in df.columns else []
        
-        # Create a working copy for analysis
-        df_analysis = df.copy()
+        # Analysis frame - filters below produce new frames, so no upfront copy is needed
+        df_analysis = df
        
         # Show data info
         with st.expander("ℹ️ Data Information", expanded=False):
@@ -239,28 +569,36 @@ if current_file is not None:
         # Sidebar filters
         st.sidebar.header("🔍 Filters")
        
-        # Sheet filter
+        # Everything that determines df_analysis - used as a cache key for aggregates
+        filter_state = [current_digest, combine_option, tuple(selected_sheets)]
+       
+        # Sheet filter (the combined sheets are already known, so the column isn't scanned)
         if 'Source_Sheet' in df.columns and len(selected_sheets) > 1:
             sheet_filter = st.sidebar.multiselect(
                 "Filter by Source Sheet",
-                options=df['Source_Sheet'].unique().tolist(),
-                default=df['Source_Sheet'].unique().tolist()
+                options=list(selected_sheets),
+                default=list(selected_sheets)
             )
-            df_analysis = df_analysis[df_analysis['Source_Sheet'].isin(sheet_filter)].copy()
+            df_analysis = df_analysis[df_analysis['Source_Sheet'].isin(sheet_filter)]
+            filter_state.append(tuple(sheet_filter))
        
-        # State filter
+        # State filter (category dtype keeps its values sorted, so no per-rerun sort is needed)
         if 'State' in df.columns:
-            states = ['All'] + sorted(df['State'].dropna().unique().tolist())
+            states = ['All'] + df['State'].cat.categories.tolist()
             selected_state = st.sidebar.selectbox("Select State", states)
             if selected_state != 'All':
-                df_analysis = df_analysis[df_analysis['State'] == selected_state].copy()
+                rows = cached_group_rows(df_analysis, tuple(filter_state), 'State')
+                df_analysis = df_analysis.take(rows.get(selected_state, []))
+            filter_state.append(selected_state)
        
         # Branch filter
         if 'Branch' in df.columns:
-            branches = ['All'] + sorted(df['Branch'].dropna().unique().tolist())
+            branches = ['All'] + df['Branch'].cat.categories.tolist()
             selected_branch = st.sidebar.selectbox("Select Branch", branches)
             if selected_branch != 'All':
-                df_analysis = df_analysis[df_analysis['Branch'] == selected_branch].copy()
+                rows = cached_group_rows(df_analysis, tuple(filter_state), 'Branch')
+                df_analysis = df_analysis.take(rows.get(selected_branch, []))
+            filter_state.append(selected_branch)
        
         # Date range filter
         if 'Call Received Date' in df.columns:
@@ -273,27 +611,50 @@ if current_file is not None:
                     min_value=min_date,
                     max_value=max_date
                 )
+                filter_state.append(tuple(date_range))
                 if len(date_range) == 2:
                     df_analysis = df_analysis[
                         (df_analysis['Call Received Date'] >= pd.Timestamp(date_range[0])) &
                         (df_analysis['Call Received Date'] <= pd.Timestamp(date_range[1]))
-                    ].copy()
+                    ]
+       
+        filter_key = tuple(filter_state)
+       
+        # Closed-status mask - computed once per rerun and reused by every tab
+        if 'Call Status' in df_analysis.columns:
+            is_closed = df_analysis['Call Status'].isin(closed_statuses)
+        else:
+            is_closed = pd.Series(False, index=df_analysis.index)
+       
+        # Close-date mask - resolved vs still-open rows, shared the same way
+        if 'Call Close Date' in df_analysis.columns:
+            has_close_date = df_analysis['Call Close Date'].notna()
+        else:
+            has_close_date = pd.Series(False, index=df_analysis.index)
        
         # Show filtered records count
         st.sidebar.markdown("---")
         st.sidebar.metric("Filtered Records", f"{len(df_analysis):,}")
        
-        # Create tabs
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        # Create tabs - a radio instead of st.tabs, so only the selected tab's body
+        # runs on each rerun (st.tabs executes every tab whether it is shown or not)
+        tab_labels = [
             "📈 Key Insights",
             "⚠️ Data Quality",
             "🔮 Future Predictions",
             "📋 Raw Data",
             "📊 Sheet Comparison"
-        ])
+        ]
+        active_tab = st.radio("View", tab_labels, horizontal=True, key="active_view",
+                              label_visibility="collapsed")
+       
+        # Widgets on hidden tabs are not rendered, and Streamlit drops their state -
+        # re-assigning the key keeps the Raw Data search across tab switches
+        if 'raw_search' in st.session_state:
+            st.session_state.raw_search = st.session_state.raw_search
        
         # ==================== TAB 1: KEY INSIGHTS ====================
-        with tab1:
+        if active_tab == tab_labels[0]:
             # KPI Metrics
             col1, col2, col3, col4 = st.columns(4)
            
@@ -303,21 +664,22 @@ if current_file is not None:
            
             with col2:
                 if 'Call Status' in df_analysis.columns:
-                    closed = len(df_analysis[df_analysis['Call Status'].str.contains('Close|Closed', case=False, na=False)])
+                    closed = int(is_closed.sum())
                     st.metric("Closed Complaints", f"{closed:,}",
                              f"{(closed/total_complaints*100):.1f}%" if total_complaints > 0 else "0%")
            
             with col3:
                 if 'Call Status' in df_analysis.columns:
-                    pending = len(df_analysis[~df_analysis['Call Status'].str.contains('Close|Closed', case=False, na=False)])
+                    pending = total_complaints - closed
                     st.metric("Pending Complaints", f"{pending:,}",
                              f"{(pending/total_complaints*100):.1f}%" if total_complaints > 0 else "0%")
            
             with col4:
                 if 'Call Received Date' in df_analysis.columns and 'Call Close Date' in df_analysis.columns:
-                    closed_df = df_analysis[df_analysis['Call Close Date'].notna()].copy()
-                    if len(closed_df) > 0:
-                        avg_resolution = (closed_df['Call Close Date'] - closed_df['Call Received Date']).dt.days.mean()
+                    if has_close_date.any():
+                        # Only the two date columns are selected - no resolved-rows frame is built
+                        avg_resolution = (df_analysis.loc[has_close_date, 'Call Close Date'] -
+                                          df_analysis.loc[has_close_date, 'Call Received Date']).dt.days.mean()
                         st.metric("Avg Resolution Time", f"{avg_resolution:.1f} days")
                     else:
                         st.metric("Avg Resolution Time", "N/A")
@@ -330,68 +692,95 @@ if current_file is not None:
             with col1:
                 if 'State' in df_analysis.columns:
                     st.subheader("📍 Complaints by State")
-                    state_counts = df_analysis['State'].value_counts().head(10)
-                    fig = px.bar(x=state_counts.index, y=state_counts.values,
-                                labels={'x': 'State', 'y': 'Number of Complaints'},
-                                color=state_counts.values,
-                                color_continuous_scale='Blues')
-                    fig.update_layout(showlegend=False, height=400)
-                    st.plotly_chart(fig, use_container_width=True)
+                   
+                    def build_state_chart():
+                        state_counts = top_counts(cached_value_counts(df_analysis, filter_key, 'State'), 10)
+                        fig = px.bar(x=state_counts.index, y=state_counts.values,
+                                    labels={'x': 'State', 'y': 'Number of Complaints'},
+                                    color=state_counts.values,
+                                    color_continuous_scale='Blues')
+                        fig.update_layout(showlegend=False, height=400)
+                        return fig
+                   
+                    fig = cached_figure(filter_key, 'state_bar', build_state_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='state_bar')
            
             with col2:
                 if 'Nature Of Fault' in df_analysis.columns:
                     st.subheader("🔧 Nature of Fault Distribution")
-                    fault_counts = df_analysis['Nature Of Fault'].value_counts().head(10)
-                    fig = px.pie(values=fault_counts.values, names=fault_counts.index, hole=0.4)
-                    fig.update_traces(textposition='inside', textinfo='percent+label')
-                    fig.update_layout(height=400)
-                    st.plotly_chart(fig, use_container_width=True)
+                   
+                    def build_fault_chart():
+                        fault_counts = top_counts(cached_value_counts(df_analysis, filter_key, 'Nature Of Fault'), 10)
+                        fig = px.pie(values=fault_counts.values, names=fault_counts.index, hole=0.4)
+                        fig.update_traces(textposition='inside', textinfo='percent+label')
+                        fig.update_layout(height=400)
+                        return fig
+                   
+                    fig = cached_figure(filter_key, 'fault_pie', build_fault_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='fault_pie')
            
             # Trend Analysis
             if 'Call Received Date' in df_analysis.columns:
                 st.subheader("📈 Monthly Complaint Trend")
-                df_temp = df_analysis.copy()
-                df_temp['Month'] = df_temp['Call Received Date'].dt.to_period('M').astype(str)
-                monthly_trend = df_temp.groupby('Month').size().reset_index(name='Count')
                
-                fig = px.line(monthly_trend, x='Month', y='Count', markers=True, line_shape='spline')
-                fig.update_layout(height=400, xaxis_tickangle=-45)
-                st.plotly_chart(fig, use_container_width=True)
+                def build_trend_chart():
+                    month = cached_month_labels(df_analysis['Call Received Date'], filter_key)
+                    monthly_trend = month.groupby(month).size().reset_index(name='Count')
+                   
+                    fig = px.line(monthly_trend, x='Month', y='Count', markers=True, line_shape='spline')
+                    fig.update_layout(height=400, xaxis_tickangle=-45)
+                    return fig
+               
+                fig = cached_figure(filter_key, 'monthly_trend', build_trend_chart)
+                st.plotly_chart(fig, use_container_width=True, key='monthly_trend')
            
             # Branch Performance
             if 'Branch' in df_analysis.columns and 'Call Status' in df_analysis.columns:
                 st.subheader("🏢 Branch Performance")
-                branch_status = pd.crosstab(df_analysis['Branch'],
-                                           df_analysis['Call Status'].str.contains('Close|Closed', case=False, na=False))
-                branch_status.columns = ['Pending', 'Closed']
                
-                fig = go.Figure(data=[
-                    go.Bar(name='Closed', x=branch_status.index, y=branch_status['Closed'], marker_color='green'),
-                    go.Bar(name='Pending', x=branch_status.index, y=branch_status['Pending'], marker_color='orange')
-                ])
-                fig.update_layout(barmode='stack', height=400, xaxis_tickangle=-45)
-                st.plotly_chart(fig, use_container_width=True)
+                def build_branch_chart():
+                    # Grouped on the Branch category codes and the closed mask - no crosstab pivot
+                    branch_status = (is_closed.groupby(df_analysis['Branch'], observed=True)
+                                     .value_counts()
+                                     .unstack(fill_value=0)
+                                     .reindex(columns=[False, True], fill_value=0))
+                    branch_status.columns = ['Pending', 'Closed']
+                   
+                    fig = go.Figure(data=[
+                        go.Bar(name='Closed', x=branch_status.index, y=branch_status['Closed'], marker_color='green'),
+                        go.Bar(name='Pending', x=branch_status.index, y=branch_status['Pending'], marker_color='orange')
+                    ])
+                    fig.update_layout(barmode='stack', height=400, xaxis_tickangle=-45)
+                    return fig
+               
+                fig = cached_figure(filter_key, 'branch_performance', build_branch_chart)
+                st.plotly_chart(fig, use_container_width=True, key='branch_performance')
        
         # ==================== TAB 2: DATA QUALITY ====================
-        with tab2:
+        if active_tab == tab_labels[1]:
             st.header("⚠️ Data Quality Analysis")
            
             st.subheader("📊 Missing Data Overview")
            
+            missing_counts = cached_missing_counts(df_analysis, filter_key)
             missing_data = pd.DataFrame({
                 'Column': df_analysis.columns,
-                'Missing Count': df_analysis.isnull().sum().values,
-                'Missing %': (df_analysis.isnull().sum().values / len(df_analysis) * 100).round(2)
+                'Missing Count': missing_counts,
+                'Missing %': (missing_counts / len(df_analysis) * 100).round(2)
             })
             missing_data = missing_data[missing_data['Missing Count'] > 0].sort_values('Missing Count', ascending=False)
            
             if len(missing_data) > 0:
-                fig = px.bar(missing_data, x='Column', y='Missing %',
-                            text='Missing %', color='Missing %',
-                            color_continuous_scale='Reds')
-                fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                fig.update_layout(height=400, xaxis_tickangle=-45)
-                st.plotly_chart(fig, use_container_width=True)
+                def build_missing_chart():
+                    fig = px.bar(missing_data, x='Column', y='Missing %',
+                                text='Missing %', color='Missing %',
+                                color_continuous_scale='Reds')
+                    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+                    fig.update_layout(height=400, xaxis_tickangle=-45)
+                    return fig
+               
+                fig = cached_figure(filter_key, 'missing_data', build_missing_chart)
+                st.plotly_chart(fig, use_container_width=True, key='missing_data')
                
                 # Fix missing_data for display
                 missing_data_display = fix_dataframe_for_arrow(missing_data)
@@ -409,10 +798,7 @@ if current_file is not None:
                 issues = []
                
                 if 'Call Status' in df_analysis.columns and 'Call Close Date' in df_analysis.columns:
-                    closed_no_date = len(df_analysis[
-                        (df_analysis['Call Status'].str.contains('Close|Closed', case=False, na=False)) &
-                        (df_analysis['Call Close Date'].isna())
-                    ])
+                    closed_no_date = int((is_closed & ~has_close_date).sum())
                     if closed_no_date > 0:
                         issues.append(f"❌ {closed_no_date} closed complaints without close date")
                
@@ -425,9 +811,7 @@ if current_file is not None:
                         issues.append(f"⚠️ {visit_no_quote} complaints with engineer visit but no quote")
                
                 if 'Call Received Date' in df_analysis.columns and 'Engineer Visit Date' in df_analysis.columns:
-                    df_temp = df_analysis.copy()
-                    df_temp['Visit Delay'] = (df_temp['Engineer Visit Date'] - df_temp['Call Received Date']).dt.days
-                    delayed_visits = len(df_temp[df_temp['Visit Delay'] > 7])
+                    delayed_visits = count_gaps_over(df_analysis['Call Received Date'], df_analysis['Engineer Visit Date'], 7)
                     if delayed_visits > 0:
                         issues.append(f"⏰ {delayed_visits} complaints with >7 days visit delay")
                
@@ -452,70 +836,71 @@ if current_file is not None:
            
             st.subheader("🔍 Duplicate Analysis")
             if 'Complaint No.' in df_analysis.columns:
-                duplicates = df_analysis[df_analysis.duplicated(subset=['Complaint No.'], keep=False)].copy()
+                duplicates = df_analysis[cached_duplicate_mask(df_analysis, filter_key, 'Complaint No.')]
                 if len(duplicates) > 0:
                     st.warning(f"⚠️ Found {len(duplicates)} duplicate complaint numbers")
                     display_cols = ['Complaint No.', 'Branch', 'Call Received Date', 'Call Status']
                     if 'Source_Sheet' in df_analysis.columns:
                         display_cols.append('Source_Sheet')
-                    duplicates_display = fix_dataframe_for_arrow(duplicates[display_cols])
+                    if len(duplicates) > MAX_TABLE_ROWS:
+                        st.caption(f"Showing the first {MAX_TABLE_ROWS:,} of {len(duplicates):,} rows")
+                    duplicates_display = fix_dataframe_for_arrow(duplicates[display_cols].head(MAX_TABLE_ROWS))
                     st.dataframe(duplicates_display, use_container_width=True)
                 else:
                     st.success("✅ No duplicate complaint numbers found!")
        
         # ==================== TAB 3: FUTURE PREDICTIONS ====================
-        with tab3:
+        if active_tab == tab_labels[2]:
             st.header("🔮 Future Predictions & Insights")
            
             if 'Call Received Date' in df_analysis.columns:
                 st.subheader("📊 Complaint Volume Forecast")
                
-                monthly_data = df_analysis.groupby(df_analysis['Call Received Date'].dt.to_period('M')).size()
-                monthly_data.index = monthly_data.index.to_timestamp()
+                monthly_data = monthly_counts(df_analysis['Call Received Date'])
                
                 if len(monthly_data) >= 3:
-                    last_3_months_avg = monthly_data.tail(3).mean()
-                    trend = (monthly_data.tail(3).values[-1] - monthly_data.tail(3).values[0]) / 2
+                    # Three-point forecast on the raw counts array - no Series slicing
+                    month_totals = monthly_data.to_numpy()
+                    last_3_months = month_totals[-3:]
+                    last_3_months_avg = last_3_months.mean()
+                    trend = (last_3_months[-1] - last_3_months[0]) / 2
                     next_month_prediction = last_3_months_avg + trend
                    
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Last Month", f"{int(monthly_data.iloc[-1]):,}")
+                        st.metric("Last Month", f"{int(month_totals[-1]):,}")
                     with col2:
                         st.metric("Predicted Next Month", f"{int(next_month_prediction):,}",
-                                 f"{((next_month_prediction - monthly_data.iloc[-1])/monthly_data.iloc[-1]*100):.1f}%")
+                                 f"{((next_month_prediction - month_totals[-1])/month_totals[-1]*100):.1f}%")
                     with col3:
                         st.metric("3-Month Average", f"{int(last_3_months_avg):,}")
                    
-                    future_months = pd.date_range(monthly_data.index[-1], periods=4, freq='M')[1:]
-                    prediction_df = pd.DataFrame({
-                        'Month': list(monthly_data.index) + list(future_months),
-                        'Complaints': list(monthly_data.values) + [next_month_prediction]*3,
-                        'Type': ['Actual']*len(monthly_data) + ['Predicted']*3
-                    })
+                    def build_prediction_chart():
+                        future_months = pd.date_range(monthly_data.index[-1], periods=4, freq='ME')[1:]
+                        prediction_df = pd.DataFrame({
+                            'Month': monthly_data.index.append(future_months),
+                            'Complaints': np.concatenate([month_totals, np.full(3, next_month_prediction)]),
+                            'Type': np.repeat(['Actual', 'Predicted'], [len(month_totals), 3])
+                        })
+                       
+                        fig = px.line(prediction_df, x='Month', y='Complaints', color='Type',
+                                     markers=True, line_dash='Type')
+                        fig.update_layout(height=400)
+                        return fig
                    
-                    fig = px.line(prediction_df, x='Month', y='Complaints', color='Type',
-                                 markers=True, line_dash='Type')
-                    fig.update_layout(height=400)
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = cached_figure(filter_key, 'prediction', build_prediction_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='prediction')
            
             st.markdown("---")
            
             # NEW FEATURE: Repetitive SOL ID Analysis
             st.subheader("🔄 Repetitive SOL ID Analysis")
             
-            sol_id_column = None
-            # Try to find SOL ID column (check various possible names)
-            possible_sol_columns = ['SOL ID', 'Sol ID', 'SOL Id', 'sol id', 'SOLID', 'Sol Id']
-            for col in df_analysis.columns:
-                if any(sol_name.lower() in col.lower() for sol_name in possible_sol_columns):
-                    sol_id_column = col
-                    break
-            
             if sol_id_column:
                 # Count repetitive SOL IDs
-                sol_id_counts = df_analysis[sol_id_column].value_counts()
+                sol_id_counts = cached_value_counts(df_analysis, filter_key, sol_id_column)
                 repetitive_sol_ids = sol_id_counts[sol_id_counts > 1]
+                top_repetitive_ids = top_counts(repetitive_sol_ids, 10)
                 
                 if len(repetitive_sol_ids) > 0:
                     col1, col2, col3 = st.columns(3)
@@ -529,27 +914,45 @@ if current_file is not None:
                     
                     # Show top repetitive SOL IDs
                     st.write("**Top 10 Repetitive SOL IDs:**")
-                    top_repetitive = repetitive_sol_ids.head(10).reset_index()
+                    top_repetitive = top_repetitive_ids.reset_index()
                     top_repetitive.columns = ['SOL ID', 'Count']
                     
-                    fig = px.bar(top_repetitive, x='SOL ID', y='Count',
-                                text='Count', color='Count',
-                                color_continuous_scale='Reds')
-                    fig.update_traces(texttemplate='%{text}', textposition='outside')
-                    fig.update_layout(height=350, showlegend=False, xaxis_tickangle=-45)
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build_sol_chart():
+                        fig = px.bar(top_repetitive, x='SOL ID', y='Count',
+                                    text='Count', color='Count',
+                                    color_continuous_scale='Reds')
+                        fig.update_traces(texttemplate='%{text}', textposition='outside')
+                        fig.update_layout(height=350, showlegend=False, xaxis_tickangle=-45)
+                        return fig
+                    
+                    fig = cached_figure(filter_key, 'repetitive_sol_ids', build_sol_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='repetitive_sol_ids')
                     
                     # Show detailed table
+                    # SOL ID x fault counts for all SOL IDs at once, most frequent first
+                    if 'Nature Of Fault' in df_analysis.columns:
+                        sol_fault_pairs = pair_counts(df_analysis[sol_id_column], df_analysis['Nature Of Fault'])
+                   
+                    # Rows of the top SOL IDs in one isin() pass, grouped once for branches and states
+                    top_sol_records = df_analysis[df_analysis[sol_id_column].isin(top_repetitive_ids.index)]
+                    top_sol_groups = top_sol_records.groupby(sol_id_column, observed=True)
+                    if 'Branch' in df_analysis.columns:
+                        branches_by_sol = top_sol_groups['Branch'].unique()
+                    if 'State' in df_analysis.columns:
+                        states_by_sol = top_sol_groups['State'].unique()
+                    
                     repetitive_details = []
-                    for sol_id in repetitive_sol_ids.head(10).index:
-                        sol_records = df_analysis[df_analysis[sol_id_column] == sol_id]
-                        branches = sol_records['Branch'].unique() if 'Branch' in df_analysis.columns else ['N/A']
-                        states = sol_records['State'].unique() if 'State' in df_analysis.columns else ['N/A']
-                        faults = sol_records['Nature Of Fault'].unique() if 'Nature Of Fault' in df_analysis.columns else ['N/A']
+                    for sol_id in top_repetitive_ids.index:
+                        branches = branches_by_sol[sol_id] if 'Branch' in df_analysis.columns else ['N/A']
+                        states = states_by_sol[sol_id] if 'State' in df_analysis.columns else ['N/A']
+                        if 'Nature Of Fault' in df_analysis.columns:
+                            faults = sol_fault_pairs.loc[sol_fault_pairs['Left'] == sol_id, 'Right'].tolist()
+                        else:
+                            faults = ['N/A']
                         
                         repetitive_details.append({
                             'SOL ID': sol_id,
-                            'Occurrences': repetitive_sol_ids[sol_id],
+                            'Occurrences': top_repetitive_ids[sol_id],
                             'Branches': ', '.join([str(b) for b in branches[:3]]),
                             'States': ', '.join([str(s) for s in states[:3]]),
                             'Common Faults': ', '.join([str(f) for f in faults[:2]])
@@ -570,27 +973,32 @@ if current_file is not None:
             
             if 'Nature Of Fault' in df_analysis.columns:
                 # Count occurrences of each fault type
-                fault_counts = df_analysis['Nature Of Fault'].value_counts()
+                fault_counts = cached_value_counts(df_analysis, filter_key, 'Nature Of Fault')
+                top_fault_counts = top_counts(fault_counts, 10)
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("Unique Fault Types", f"{len(fault_counts):,}")
                 with col2:
-                    st.metric("Most Common Issue", fault_counts.index[0] if len(fault_counts) > 0 else "N/A")
+                    st.metric("Most Common Issue", top_fault_counts.index[0] if len(fault_counts) > 0 else "N/A")
                 with col3:
-                    st.metric("Occurrences", f"{fault_counts.iloc[0]:,}" if len(fault_counts) > 0 else "0")
+                    st.metric("Occurrences", f"{top_fault_counts.iloc[0]:,}" if len(fault_counts) > 0 else "0")
                 
                 # Top recurring faults
                 st.write("**Top 10 Recurring Issues:**")
-                top_faults = fault_counts.head(10).reset_index()
+                top_faults = top_fault_counts.reset_index()
                 top_faults.columns = ['Nature Of Fault', 'Count']
                 
-                fig = px.bar(top_faults, x='Nature Of Fault', y='Count',
-                            text='Count', color='Count',
-                            color_continuous_scale='Oranges')
-                fig.update_traces(texttemplate='%{text}', textposition='outside')
-                fig.update_layout(height=400, showlegend=False, xaxis_tickangle=-45)
-                st.plotly_chart(fig, use_container_width=True)
+                def build_top_faults_chart():
+                    fig = px.bar(top_faults, x='Nature Of Fault', y='Count',
+                                text='Count', color='Count',
+                                color_continuous_scale='Oranges')
+                    fig.update_traces(texttemplate='%{text}', textposition='outside')
+                    fig.update_layout(height=400, showlegend=False, xaxis_tickangle=-45)
+                    return fig
+                
+                fig = cached_figure(filter_key, 'top_faults', build_top_faults_chart)
+                st.plotly_chart(fig, use_container_width=True, key='top_faults')
                 
                 # Detailed analysis by state and branch
                 col1, col2 = st.columns(2)
@@ -606,7 +1014,8 @@ if current_file is not None:
                         fault_state_details = []
                         for fault in fault_by_state.index:
                             fault_records = df_analysis[df_analysis['Nature Of Fault'] == fault]
-                            top_states = fault_records['State'].value_counts().head(3)
+                            top_states = fault_records['State'].value_counts()
+                            top_states = top_states[top_states > 0].head(3)
                             fault_state_details.append({
                                 'Issue': fault,
                                 'Total Count': fault_by_state[fault],
@@ -628,7 +1037,8 @@ if current_file is not None:
                         fault_branch_details = []
                         for fault in fault_by_branch.index:
                             fault_records = df_analysis[df_analysis['Nature Of Fault'] == fault]
-                            top_branches = fault_records['Branch'].value_counts().head(3)
+                            top_branches = fault_records['Branch'].value_counts()
+                            top_branches = top_branches[top_branches > 0].head(3)
                             fault_branch_details.append({
                                 'Issue': fault,
                                 'Total Count': fault_by_branch[fault],
@@ -643,19 +1053,24 @@ if current_file is not None:
                 if 'Call Received Date' in df_analysis.columns:
                     st.write("**Recurring Issues Trend Over Time:**")
                     
-                    # Get top 5 faults
-                    top_5_faults = fault_counts.head(5).index.tolist()
-                    
-                    df_temp = df_analysis[df_analysis['Nature Of Fault'].isin(top_5_faults)].copy()
-                    df_temp['Month'] = df_temp['Call Received Date'].dt.to_period('M').astype(str)
-                    
-                    fault_trend = df_temp.groupby(['Month', 'Nature Of Fault']).size().reset_index(name='Count')
+                    def build_fault_trend_chart():
+                        # Get top 5 faults
+                        top_5_faults = top_fault_counts.head(5).index.tolist()
+                        
+                        in_top_5 = df_analysis['Nature Of Fault'].isin(top_5_faults)
+                        faults = df_analysis.loc[in_top_5, 'Nature Of Fault']
+                        month = cached_month_labels(df_analysis['Call Received Date'], filter_key)[in_top_5]
+                        
+                        fault_trend = faults.groupby([month, faults], observed=True).size().reset_index(name='Count')
+                        
+                        fig = px.line(fault_trend, x='Month', y='Count',
+                                     color='Nature Of Fault', markers=True)
+                        fig.update_layout(height=400, xaxis_tickangle=-45,
+                                         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+                        return fig
                     
-                    fig = px.line(fault_trend, x='Month', y='Count',
-                                 color='Nature Of Fault', markers=True)
-                    fig.update_layout(height=400, xaxis_tickangle=-45,
-                                     legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = cached_figure(filter_key, 'fault_trend', build_fault_trend_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='fault_trend')
             else:
                 st.info("ℹ️ 'Nature Of Fault' column not found in the data.")
             
@@ -667,25 +1082,29 @@ if current_file is not None:
                 st.subheader("🎯 High Priority Areas")
                
                 if 'State' in df_analysis.columns and 'Call Status' in df_analysis.columns:
-                    pending_by_state = df_analysis[
-                        ~df_analysis['Call Status'].str.contains('Close|Closed', case=False, na=False)
-                    ].groupby('State').size().sort_values(ascending=False).head(5)
+                    def build_pending_chart():
+                        pending_by_state = df_analysis[
+                            ~is_closed
+                        ].groupby('State', observed=True).size().sort_values(ascending=False).head(5)
+                       
+                        fig = px.bar(x=pending_by_state.index, y=pending_by_state.values,
+                                    labels={'x': 'State', 'y': 'Pending Complaints'},
+                                    color=pending_by_state.values,
+                                    color_continuous_scale='Reds')
+                        fig.update_layout(height=350, showlegend=False)
+                        return fig
                    
-                    fig = px.bar(x=pending_by_state.index, y=pending_by_state.values,
-                                labels={'x': 'State', 'y': 'Pending Complaints'},
-                                color=pending_by_state.values,
-                                color_continuous_scale='Reds')
-                    fig.update_layout(height=350, showlegend=False)
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = cached_figure(filter_key, 'pending_by_state', build_pending_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='pending_by_state')
            
             with col2:
                 st.subheader("⚡ Action Items")
                
                 if 'Call Received Date' in df_analysis.columns and 'Call Close Date' in df_analysis.columns:
-                    pending_df = df_analysis[df_analysis['Call Close Date'].isna()].copy()
+                    pending_df = df_analysis[~has_close_date]
                     if len(pending_df) > 0:
-                        pending_df['Days Open'] = (datetime.now() - pending_df['Call Received Date']).dt.days
-                        old_complaints = len(pending_df[pending_df['Days Open'] > 30])
+                        now = datetime.now()
+                        old_complaints = count_gaps_over(pending_df['Call Received Date'], now, 30)
                        
                         st.error(f"🚨 {old_complaints} complaints open >30 days")
                         st.warning(f"⚠️ {len(pending_df)} total pending complaints")
@@ -694,32 +1113,23 @@ if current_file is not None:
                         display_cols = ['Complaint No.', 'Branch', 'State', 'Days Open', 'Nature Of Fault']
                         if 'Source_Sheet' in df_analysis.columns:
                             display_cols.append('Source_Sheet')
-                        oldest = pending_df.nlargest(5, 'Days Open')[display_cols]
+                        # Oldest by received date - Days Open is only computed for the five displayed rows
+                        oldest = pending_df.loc[pending_df['Call Received Date'].nsmallest(5).index]
+                        oldest = oldest.assign(**{'Days Open': (now - oldest['Call Received Date']).dt.days})[display_cols]
                         oldest_display = fix_dataframe_for_arrow(oldest)
                         st.dataframe(oldest_display, use_container_width=True)
        
         # ==================== TAB 4: RAW DATA ====================
-        with tab4:
+        if active_tab == tab_labels[3]:
             st.header("📋 Raw Data")
            
-            search = st.text_input("🔍 Search in data", "")
-           
-            # Fix dataframe for display
-            df_display = fix_dataframe_for_arrow(df_analysis)
-           
-            if search:
-                mask = df_display.astype(str).apply(lambda x: x.str.contains(search, case=False, na=False)).any(axis=1)
-                filtered_df = df_display[mask]
-                st.write(f"Found {len(filtered_df)} matching records")
-                st.dataframe(filtered_df, use_container_width=True)
-            else:
-                st.dataframe(df_display, use_container_width=True)
+            raw_data_table(df_analysis, filter_key)
            
             st.subheader("💾 Download Options")
            
             col1, col2 = st.columns(2)
             with col1:
-                csv = df_analysis.to_csv(index=False).encode('utf-8')
+                csv = cached_csv(df_analysis, filter_key)
                 st.download_button(
                     label="📥 Download Filtered Data as CSV",
                     data=csv,
@@ -728,7 +1138,7 @@ if current_file is not None:
                 )
            
             with col2:
-                summary = df_analysis.describe(include='all').to_csv().encode('utf-8')
+                summary = cached_summary_csv(df_analysis, filter_key)
                 st.download_button(
                     label="📊 Download Summary Report",
                     data=summary,
@@ -737,20 +1147,20 @@ if current_file is not None:
                 )
        
         # ==================== TAB 5: SHEET COMPARISON ====================
-        with tab5:
+        if active_tab == tab_labels[4]:
             st.header("📊 Sheet Comparison Analysis")
            
             if 'Source_Sheet' in df_analysis.columns and len(selected_sheets) > 1:
                 st.subheader("📈 Sheet-wise Statistics")
                
-                sheet_stats = df_analysis.groupby('Source_Sheet').agg({
+                sheet_stats = df_analysis.groupby('Source_Sheet', observed=True).agg({
                     df_analysis.columns[0]: 'count'
                 }).rename(columns={df_analysis.columns[0]: 'Total Records'})
                
                 if 'Call Status' in df_analysis.columns:
                     closed_by_sheet = df_analysis[
-                        df_analysis['Call Status'].str.contains('Close|Closed', case=False, na=False)
-                    ].groupby('Source_Sheet').size()
+                        is_closed
+                    ].groupby('Source_Sheet', observed=True).size()
                     sheet_stats['Closed'] = closed_by_sheet
                     sheet_stats['Pending'] = sheet_stats['Total Records'] - sheet_stats['Closed'].fillna(0)
                     sheet_stats['Closure Rate %'] = (sheet_stats['Closed'] / sheet_stats['Total Records'] * 100).round(2)
@@ -762,32 +1172,43 @@ if current_file is not None:
                
                 with col1:
                     st.subheader("Records per Sheet")
-                    fig = px.bar(sheet_stats, y='Total Records',
-                                color='Total Records',
-                                color_continuous_scale='Viridis')
-                    fig.update_layout(height=400, showlegend=False)
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build_records_chart():
+                        fig = px.bar(sheet_stats, y='Total Records',
+                                    color='Total Records',
+                                    color_continuous_scale='Viridis')
+                        fig.update_layout(height=400, showlegend=False)
+                        return fig
+                   
+                    fig = cached_figure(filter_key, 'sheet_records', build_records_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='sheet_records')
                
                 with col2:
                     if 'Closure Rate %' in sheet_stats.columns:
                         st.subheader("Closure Rate by Sheet")
-                        fig = px.bar(sheet_stats, y='Closure Rate %',
-                                    color='Closure Rate %',
-                                    color_continuous_scale='RdYlGn')
-                        fig.update_layout(height=400, showlegend=False)
-                        st.plotly_chart(fig, use_container_width=True)
+                        def build_closure_chart():
+                            fig = px.bar(sheet_stats, y='Closure Rate %',
+                                        color='Closure Rate %',
+                                        color_continuous_scale='RdYlGn')
+                            fig.update_layout(height=400, showlegend=False)
+                            return fig
+                       
+                        fig = cached_figure(filter_key, 'sheet_closure_rate', build_closure_chart)
+                        st.plotly_chart(fig, use_container_width=True, key='sheet_closure_rate')
                
                 if 'Call Received Date' in df_analysis.columns:
                     st.subheader("📅 Monthly Trends Comparison")
                    
-                    df_temp = df_analysis.copy()
-                    df_temp['Month'] = df_temp['Call Received Date'].dt.to_period('M').astype(str)
-                    monthly_by_sheet = df_temp.groupby(['Month', 'Source_Sheet']).size().reset_index(name='Count')
+                    def build_sheet_trend_chart():
+                        month = cached_month_labels(df_analysis['Call Received Date'], filter_key)
+                        monthly_by_sheet = month.groupby([month, df_analysis['Source_Sheet']], observed=True).size().reset_index(name='Count')
+                       
+                        fig = px.line(monthly_by_sheet, x='Month', y='Count',
+                                     color='Source_Sheet', markers=True)
+                        fig.update_layout(height=400, xaxis_tickangle=-45)
+                        return fig
                    
-                    fig = px.line(monthly_by_sheet, x='Month', y='Count',
-                                 color='Source_Sheet', markers=True)
-                    fig.update_layout(height=400, xaxis_tickangle=-45)
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = cached_figure(filter_key, 'sheet_monthly_trend', build_sheet_trend_chart)
+                    st.plotly_chart(fig, use_container_width=True, key='sheet_monthly_trend')
                
             else:
                 st.info("ℹ️ Sheet comparison is available when multiple sheets are combined or selected")
@@ -796,6 +1217,7 @@ if current_file is not None:
                 st.write("2. The dashboard will show comparison metrics across sheets")
        
     except Exception as e:
+        load_progress.empty()
         st.error(f"❌ Error loading file: {str(e)}")
         with st.expander("🔍 Debug Information"):
             st.write(f"Error type: {type(e).__name__}")
@@ -0,0 +1,105 @@
+from io import BytesIO
+
+import pandas as pd
+
+import streamlit_dashboard as dashboard
+
+
+# Helper to build an in-memory workbook from {sheet_name: DataFrame}
+def make_workbook(sheets):
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for sheet_name, sheet_df in sheets.items():
+            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return buffer.getvalue()
+
+
+def test_blank_and_header_only_sheets_load():
+    file_bytes = make_workbook({
+        'Data': pd.DataFrame({'State': ['A', 'B'], 'Call Status': ['Closed', 'Open']}),
+        'Blank': pd.DataFrame(),
+        'Header': pd.DataFrame(columns=['State', 'Call Status']),
+    })
+    
+    workbook = dashboard.read_workbook(file_bytes)
+    assert list(workbook) == ['Data', 'Blank', 'Header']
+    assert workbook['Blank'].shape == (0, 0)
+    assert list(workbook['Header'].columns) == ['State', 'Call Status']
+    
+    combined = dashboard.combine_sheets(workbook, ['Data', 'Blank', 'Header'])
+    assert len(combined) == 2
+    assert combined['Source_Sheet'].tolist() == ['Data', 'Data']
+
+
+def test_combine_sheets_falls_back_to_pandas_on_arrow_errors(monkeypatch):
+    workbook = {
+        'Jan': pd.DataFrame({'Remark': pd.Series([None, None], dtype=object)}),
+        'Feb': pd.DataFrame({'Remark': ['late visit']}),
+    }
+    
+    def unsupported_concat(*args, **kwargs):
+        raise dashboard.pa.ArrowNotImplementedError('Unsupported cast from null to string')
+    monkeypatch.setattr(dashboard.pa, 'concat_tables', unsupported_concat)
+    
+    combined = dashboard.combine_sheets(workbook, ['Jan', 'Feb'])
+    assert combined['Remark'].tolist()[2] == 'late visit'
+    assert combined['Source_Sheet'].tolist() == ['Jan', 'Jan', 'Feb']
+
+
+def test_csv_download_matches_to_csv_format():
+    file_bytes = make_workbook({
+        'Data': pd.DataFrame({
+            'State': ['Delhi', 'Goa, North'],
+            'Call Received Date': pd.to_datetime(['2024-01-05', '2024-02-06']),
+            'Amount': [10.5, None],
+        }),
+    })
+    df = dashboard.read_workbook(file_bytes)['Data']
+    
+    csv = dashboard.cached_csv(df, ('test_csv_download_matches_to_csv_format',))
+    assert csv == df.to_csv(index=False).encode('utf-8')
+    assert csv == (b'State,Call Received Date,Amount\n'
+                   b'Delhi,2024-01-05,10.5\n'
+                   b'"Goa, North",2024-02-06,\n')
+
+
+def test_ambiguous_text_dates_are_read_month_first():
+    ambiguous = pd.Series(['01/02/2024', '03/04/2024', None], dtype=object)
+    assert dashboard.parse_dates(ambiguous).tolist()[:2] == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-03-04')]
+    
+    # A day above 12 only fits day-first, so the whole column is read that way
+    day_first = pd.Series(['01/02/2024', '25/12/2024'], dtype=object)
+    assert dashboard.parse_dates(day_first).tolist() == [pd.Timestamp('2024-02-01'), pd.Timestamp('2024-12-25')]
+
+
+def test_top_counts_breaks_ties_by_original_order():
+    counts = pd.Series([1, 3, 5, 3, 3, 3], index=list('abcdef'))
+    assert dashboard.top_counts(counts, 3).index.tolist() == ['c', 'b', 'd']
+    assert dashboard.top_counts(counts, 10).index.tolist() == ['c', 'b', 'd', 'e', 'f', 'a']
+    
+    # Same result as a full stable sort, for every cut
+    for k in range(1, len(counts) + 1):
+        expected = counts.sort_values(ascending=False, kind='stable').head(k)
+        assert dashboard.top_counts(counts, k).index.tolist() == expected.index.tolist()
+
+
+def test_combined_sheets_keep_single_sheet_dtypes(monkeypatch):
+    file_bytes = make_workbook({
+        'Jan': pd.DataFrame({'State': ['A', 'B'], 'Amount': [1.5, 2.0], 'Remark': [None, None],
+                             'Call Received Date': pd.to_datetime(['2024-01-05', '2024-01-06'])}),
+        'Feb': pd.DataFrame({'State': ['C'], 'Amount': [3.5], 'Remark': ['late visit'],
+                             'Call Received Date': pd.to_datetime(['2024-02-05'])}),
+    })
+    workbook = dashboard.read_workbook(file_bytes)
+    expected = workbook['Feb'].dtypes
+    
+    combined = dashboard.combine_sheets(workbook, ['Jan', 'Feb'])
+    assert combined.drop(columns='Source_Sheet').dtypes.equals(expected)
+    assert isinstance(combined['Source_Sheet'].dtype, pd.CategoricalDtype)
+    
+    # The pandas fallback produces the same dtypes
+    def unsupported_concat(*args, **kwargs):
+        raise dashboard.pa.ArrowNotImplementedError('Unsupported cast')
+    monkeypatch.setattr(dashboard.pa, 'concat_tables', unsupported_concat)
+    fallback = dashboard.combine_sheets(workbook, ['Jan', 'Feb'])
+    assert fallback.dtypes.equals(combined.dtypes)